@@ -10,13 +10,36 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 # Application Configuration
 MAX_PAGES_TO_SCRAPE = 50
 REQUEST_TIMEOUT = 30  # seconds
+MAX_PAGE_BYTES = 2 * 1024 * 1024  # larger responses are skipped by the HTTP fallback scraper and the static fetch
+HTTP_CACHE_PATH = "http_cache.db"  # SQLite HTTP cache for the fallback scraper, kept by hishel under .cache/hishel/; None disables it
+CRAWL_MAX_REQUESTS_PER_SECOND = 5  # per host
+ANALYSIS_MAX_WORKERS = 8  # subsections analyzed in parallel
+SECTION_KEYWORD_PREFILTER = False  # only pages mentioning an (English) sections-config term go to section analysis
+SIMPLE_SCRAPER_MAX_WORKERS = 16  # pages fetched concurrently by the HTTP fallback scraper
+SIMPLE_SCRAPER_PARSE_PROCESSES = 0  # worker processes parsing pages for the HTTP fallback; 0 parses in threads, which suits small crawls
+SIMPLE_ANALYSIS_BATCH_PAGES = 5  # pages per analysis call in the HTTP fallback; batches run in parallel
+PAGE_CONTENT_MAX_CHARS = 8192  # page text kept per page; prompts only use the first couple of KB
+NEAR_DUPLICATE_MAX_DISTANCE = 3  # SimHash bits; closer pages are left out of the overall analysis
 USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 
 # Playwright Configuration
 PLAYWRIGHT_HEADLESS = False  # Set to True for headless mode, False to see browser
 PLAYWRIGHT_VIEWPORT = {'width': 1920, 'height': 1080}
-PLAYWRIGHT_WAIT_FOR_NETWORK_IDLE = True
-PLAYWRIGHT_EXTRA_WAIT_TIME = 2000  # milliseconds
+PLAYWRIGHT_MAX_CONCURRENCY = 5  # pages scraped in parallel
+LINK_FILTER_WORKERS = 2  # pages whose links are judged for relevance in parallel
+LINK_RELEVANCE_BATCH_SIZE = 30  # links judged per agent call
+LINK_RELEVANCE_TOP_K = 40  # links per page sent to the agent, the ones most similar to the target sections (needs sentence-transformers); None sends all
+LINK_EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # sentence-transformers model for that similarity, if installed
+LINK_RELEVANCE_CACHE_PATH = ".cache/link_relevance/verdicts"  # shelve file for link verdicts; None keeps them in memory only
+PLAYWRIGHT_BLOCK_RESOURCES = True  # Skip images/media/fonts/CSS; set to False for fully rendered screenshots
+PLAYWRIGHT_CONTENT_WAIT_TIMEOUT = 1500  # milliseconds to wait for links after DOMContentLoaded
+STATIC_FETCH_ENABLED = True  # Try a plain HTTP fetch before loading a page in Chromium (skipped when screenshots are on)
+STATIC_FETCH_MIN_TEXT_LENGTH = 500  # characters of text for a fetched page to count as static
+
+# Screenshot Configuration
+ENABLE_SCREENSHOTS = False  # Screenshots are only for display; the AI analysis doesn't use them
+SCREENSHOT_MAX_HEIGHT = 1080  # pixels
+SCREENSHOT_JPEG_QUALITY = 60
 
 # Streamlit Configuration
 PAGE_TITLE = "University Website Information Collector"
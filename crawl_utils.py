@@ -0,0 +1,271 @@
+"""
+Shared crawling helpers used by both website scrapers
+"""
+
+import asyncio
+import atexit
+import hashlib
+import math
+import os
+import re
+import shelve
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+    uvloop = None
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+    ahocorasick = None
+
+# Document, media and archive links that are never worth crawling
+SKIP_EXT_RE = re.compile(r'\.(pdf|docx?|jpe?g|png|gif|mp[34]|zip|exe)(?:$|[?#])', re.I)
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+class HostRateLimiter:
+    """Per-host token bucket that only throttles when a host is requested faster than max_rate"""
+    
+    def __init__(self, max_rate: float, time_period: float = 1.0):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._buckets = {}  # host -> (tokens, last refill time)
+        self._lock = threading.Lock()
+    
+    def reserve(self, url: str) -> float:
+        """Take a token for the URL's host and return the seconds to wait before using it"""
+        host = urlparse(url).netloc
+        refill_rate = self.max_rate / self.time_period
+        
+        with self._lock:
+            now = time.monotonic()
+            tokens, last_refill = self._buckets.get(host, (self.max_rate, now))
+            tokens = min(self.max_rate, tokens + (now - last_refill) * refill_rate) - 1
+            self._buckets[host] = (tokens, now)
+        
+        # A negative balance means the token is borrowed from the future
+        return max(0.0, -tokens / refill_rate)
+    
+    def acquire(self, url: str):
+        """Block until a request to the URL's host is allowed"""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+    
+    async def acquire_async(self, url: str):
+        """Wait without blocking the event loop until a request to the URL's host is allowed"""
+        delay = self.reserve(url)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class _LoopThread:
+    """An event loop running forever in a daemon thread, started on first use and ended with the process"""
+    
+    def __init__(self):
+        self.loop: asyncio.AbstractEventLoop = None
+        self._thread: threading.Thread = None
+        self._lock = threading.Lock()
+    
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self.loop is None:
+                # uvloop's libuv-based loop schedules many concurrent agent calls more cheaply
+                self.loop = uvloop.new_event_loop() if UVLOOP_AVAILABLE else asyncio.new_event_loop()
+                if hasattr(asyncio, 'eager_task_factory'):
+                    # Python 3.12+: run each task synchronously until it first has to wait
+                    self.loop.set_task_factory(asyncio.eager_task_factory)
+                self._thread = threading.Thread(target=self.loop.run_forever, name="shared-event-loop", daemon=True)
+                self._thread.start()
+            return self.loop
+
+
+# One loop for every agent call in the process, so concurrent calls share it and its connections
+_LOOP_THREAD = _LoopThread()
+
+
+def run_on_shared_loop(coro):
+    """Run a coroutine on the shared background loop and wait for its result
+    
+    Safe to call from any thread except the loop's own, including threads that
+    already have a running event loop.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _LOOP_THREAD.get_loop()).result()
+
+
+def cache_url(url: str) -> str:
+    """URL with the fragment and tracking parameters dropped and the query sorted"""
+    parsed = urlparse(url)
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_')
+    )
+    return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), parsed.path or '/',
+                       parsed.params, urlencode(query), ''))
+
+
+_URL_TOKEN_RE = re.compile(r'[a-z]+|[0-9]+')
+
+
+def _url_vector(path: str) -> Dict[int, int]:
+    """Hashed bag of the words in a URL path, with every number counted as the same token"""
+    vector = {}
+    for token in _URL_TOKEN_RE.findall(path.lower()):
+        bucket = 0 if token.isdigit() else zlib.crc32(token.encode()) & 0xFFFFF
+        vector[bucket] = vector.get(bucket, 0) + 1
+    return vector
+
+
+def _cosine(a: Dict[int, int], b: Dict[int, int]) -> float:
+    dot = sum(count * b.get(bucket, 0) for bucket, count in a.items())
+    if not dot:
+        return 0.0
+    norm_a = math.sqrt(sum(count * count for count in a.values()))
+    norm_b = math.sqrt(sum(count * count for count in b.values()))
+    return dot / (norm_a * norm_b)
+
+
+class LinkVerdictCache:
+    """Link relevance verdicts keyed by URL, reused for the same URL or a near-identical one
+    
+    A near-identical URL must be on the same host, in the same directory, with the same query and
+    evaluated for the same sections, and its path words must be at least similarity_threshold
+    cosine-similar. Query values are never fuzzy-matched, since index.php?id=17 and
+    index.php?id=4242 are usually unrelated pages. Verdicts are also kept in a shelve file when a
+    path is given.
+    """
+    
+    def __init__(self, path: str = None, similarity_threshold: float = 0.92):
+        self.similarity_threshold = similarity_threshold
+        self._exact = {}  # "sections\nurl" -> verdict
+        self._similar = {}  # (sections, host, directory, query) -> [(vector, verdict)]
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                self._db = shelve.open(path)
+                for key, verdict in self._db.items():
+                    sections_key, url = key.split('\n', 1)
+                    self._remember(sections_key, url, verdict)
+                # Some dbm backends only write everything out on close
+                atexit.register(self.close)
+            except Exception as e:
+                print(f"⚠️ Link relevance cache at {path} unavailable, keeping it in memory: {e}")
+                self._db = None
+    
+    def _remember(self, sections_key: str, url: str, verdict: Dict):
+        parsed = urlparse(url)
+        directory = parsed.path.rsplit('/', 1)[0]
+        self._exact[f"{sections_key}\n{url}"] = verdict
+        self._similar.setdefault((sections_key, parsed.netloc, directory, parsed.query), []).append(
+            (_url_vector(parsed.path), verdict)
+        )
+    
+    def get(self, url: str, sections_key: str = "") -> Optional[Dict]:
+        """Cached verdict for the URL or a near-identical one, or None"""
+        url = cache_url(url)
+        with self._lock:
+            verdict = self._exact.get(f"{sections_key}\n{url}")
+            if verdict is not None:
+                return verdict
+            parsed = urlparse(url)
+            directory = parsed.path.rsplit('/', 1)[0]
+            candidates = self._similar.get((sections_key, parsed.netloc, directory, parsed.query), ())
+            if not candidates:
+                return None
+            vector = _url_vector(parsed.path)
+            best_score, best_verdict = max(
+                ((_cosine(vector, other), verdict) for other, verdict in candidates),
+                key=lambda item: item[0]
+            )
+            return best_verdict if best_score >= self.similarity_threshold else None
+    
+    def put(self, url: str, verdict: Dict, sections_key: str = ""):
+        """Remember the verdict for the URL"""
+        url = cache_url(url)
+        with self._lock:
+            self._remember(sections_key, url, verdict)
+            if self._db is not None:
+                self._db[f"{sections_key}\n{url}"] = verdict
+    
+    def close(self):
+        """Flush and close the shelve file, if any"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def simhash(text: str, bits: int = 64) -> int:
+    """SimHash fingerprint of a text's word 3-grams; near-duplicate texts differ in only a few bits"""
+    words = _WORD_RE.findall(text.lower())
+    shingles = Counter(' '.join(words[i:i + 3]) for i in range(max(1, len(words) - 2)))
+    weights = [0] * bits
+    for shingle, count in shingles.items():
+        digest = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=bits // 8).digest(), 'big')
+        for i in range(bits):
+            weights[i] += count if digest >> i & 1 else -count
+    return sum(1 << i for i, weight in enumerate(weights) if weight > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def drop_near_duplicates(pages: List[Dict], max_distance: int = 3) -> Tuple[List[Dict], List[Dict]]:
+    """Split pages into those with distinct content and those within max_distance bits of an earlier one"""
+    kept, duplicates = [], []
+    fingerprints = []
+    for page in pages:
+        fingerprint = simhash(page.get('content', ''))
+        if any(hamming_distance(fingerprint, seen) <= max_distance for seen in fingerprints):
+            duplicates.append(page)
+        else:
+            fingerprints.append(fingerprint)
+            kept.append(page)
+    return kept, duplicates
+
+
+class KeywordMatcher:
+    """Checks in one pass over a text whether any word in it starts with one of the keywords
+    
+    Uses a pyahocorasick automaton when installed and a single compiled regex otherwise.
+    """
+    
+    def __init__(self, keywords):
+        self.keywords = sorted({keyword.lower() for keyword in keywords if keyword})
+        self._automaton = None
+        self._regex = None
+        if AHOCORASICK_AVAILABLE and self.keywords:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                self._automaton.add_word(keyword, len(keyword))
+            self._automaton.make_automaton()
+        elif self.keywords:
+            self._regex = re.compile(r'\b(?:' + '|'.join(map(re.escape, self.keywords)) + ')')
+    
+    def matches(self, text: str) -> bool:
+        text = text.lower()
+        if self._automaton is not None:
+            for end, length in self._automaton.iter(text):
+                start = end - length + 1
+                if start == 0 or not text[start - 1].isalnum():
+                    return True
+            return False
+        return self._regex is not None and self._regex.search(text) is not None
@@ -4,10 +4,12 @@ Simple test script to verify the application components work correctly.
 Run this before using the main application.
 """
 
+import asyncio
 import os
 import sys
 from website_scraper import WebsiteScraper, UniversityInfoAgent
 from config import OPENAI_API_KEY
+from crawl_utils import HostRateLimiter, KeywordMatcher, LinkVerdictCache, hamming_distance, simhash
 
 def test_imports():
     """Test that all required modules can be imported"""
@@ -48,6 +50,48 @@ def test_config():
         print("Please set OPENAI_API_KEY environment variable or create a .env file")
         return False
 
+def test_crawl_utils():
+    """Test the shared crawling helpers (no network or API calls)"""
+    print("\nTesting crawl helpers...")
+    
+    try:
+        # Rate limiter: a burst up to max_rate is free, then requests are spaced out per host
+        limiter = HostRateLimiter(max_rate=2)
+        delays = [limiter.reserve("https://a.example/page") for _ in range(3)]
+        assert delays[:2] == [0.0, 0.0] and 0.4 < delays[2] <= 0.5, delays
+        assert limiter.reserve("https://b.example/page") == 0.0
+        print("✅ HostRateLimiter throttles per host")
+        
+        # Verdict cache: exact hits, near-identical URLs in the same directory, nothing across sections or queries
+        cache = LinkVerdictCache()
+        cache.put("https://a.example/news/article-2023-05?utm_source=x", {'is_worth_checking': False}, "S")
+        assert cache.get("https://a.example/news/article-2023-05", "S") == {'is_worth_checking': False}
+        assert cache.get("https://a.example/news/article-2024-01", "S") is not None
+        assert cache.get("https://a.example/news/article-2024-01", "Other") is None
+        assert cache.get("https://a.example/jobs/article-2023-05", "S") is None
+        cache.put("https://a.example/index.php?id=17", {'is_worth_checking': True}, "S")
+        assert cache.get("https://a.example/index.php?id=4242", "S") is None
+        print("✅ LinkVerdictCache reuses verdicts for similar URLs")
+        
+        # SimHash: a small edit keeps the fingerprint close, different text does not
+        text = " ".join(f"section {i} describes programme {i % 13} in detail" for i in range(100))
+        other = " ".join(f"lab {i} studies molecule {i % 11} under pressure" for i in range(100))
+        assert hamming_distance(simhash(text), simhash(text + " Contact us today.")) <= 3
+        assert hamming_distance(simhash(text), simhash(other)) > 3
+        print("✅ simhash finds near-duplicate pages")
+        
+        # Keyword matcher: matches at the start of words only
+        matcher = KeywordMatcher(["career", "polic"])
+        assert matcher.matches("Careers at the university") and matcher.matches("Privacy policies")
+        assert not matcher.matches("Metropolice and jobcareers")
+        assert not KeywordMatcher([]).matches("anything")
+        print("✅ KeywordMatcher matches keyword prefixes")
+        return True
+        
+    except AssertionError as e:
+        print(f"❌ Crawl helper check failed: {e}")
+        return False
+
 def test_website_scraper():
     """Test basic website scraping functionality"""
     print("\nTesting website scraper...")
@@ -61,9 +105,14 @@ def test_website_scraper():
         print(f"Testing with: {test_url}")
         
         # Start browser for testing
-        scraper.start_browser()
-        result = scraper.scrape_page(test_url)
-        scraper.close_browser()
+        async def scrape_test_page():
+            await scraper.start_browser()
+            try:
+                return await scraper.scrape_page(test_url)
+            finally:
+                await scraper.close_browser()
+        
+        result = asyncio.run(scrape_test_page())
         
         if 'error' not in result:
             print("✅ Basic scraping test passed")
@@ -101,6 +150,7 @@ def main():
     tests = [
         test_imports,
         test_config,
+        test_crawl_utils,
         test_website_scraper,
         test_agent_initialization
     ]
@@ -1,30 +1,204 @@
-from playwright.sync_api import sync_playwright, Browser, Page
-from bs4 import BeautifulSoup
+from playwright.async_api import async_playwright, Browser, Page, TimeoutError as PlaywrightTimeoutError
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
 from urllib.parse import urljoin, urlparse
+import asyncio
+import hashlib
+import itertools
+import threading
 import time
 import re
 import os
-from typing import List, Dict, Set
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Dict, Set, Tuple, Literal
 from agents import Agent, Runner
+from pydantic import BaseModel
 import json
+from crawl_utils import (
+    SKIP_EXT_RE, WHITESPACE_RE, HostRateLimiter, KeywordMatcher, LinkVerdictCache, drop_near_duplicates,
+    run_on_shared_loop
+)
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+    httpx = None
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+    SentenceTransformer = None
+
 from config import (
-    REQUEST_TIMEOUT, USER_AGENT, MAX_PAGES_TO_SCRAPE,
-    PLAYWRIGHT_HEADLESS, PLAYWRIGHT_VIEWPORT, 
-    PLAYWRIGHT_WAIT_FOR_NETWORK_IDLE, PLAYWRIGHT_EXTRA_WAIT_TIME
+    REQUEST_TIMEOUT, USER_AGENT, MAX_PAGES_TO_SCRAPE, MAX_PAGE_BYTES, CRAWL_MAX_REQUESTS_PER_SECOND,
+    PLAYWRIGHT_HEADLESS, PLAYWRIGHT_VIEWPORT, PLAYWRIGHT_MAX_CONCURRENCY, PLAYWRIGHT_BLOCK_RESOURCES,
+    PLAYWRIGHT_CONTENT_WAIT_TIMEOUT, ANALYSIS_MAX_WORKERS, SECTION_KEYWORD_PREFILTER, PAGE_CONTENT_MAX_CHARS,
+    STATIC_FETCH_ENABLED, STATIC_FETCH_MIN_TEXT_LENGTH, LINK_FILTER_WORKERS, LINK_RELEVANCE_CACHE_PATH,
+    LINK_RELEVANCE_BATCH_SIZE, LINK_RELEVANCE_TOP_K, LINK_EMBEDDING_MODEL, NEAR_DUPLICATE_MAX_DISTANCE,
+    ENABLE_SCREENSHOTS, SCREENSHOT_MAX_HEIGHT, SCREENSHOT_JPEG_QUALITY
 )
 
+# Non-page schemes that are never worth crawling
+_BAD_SCHEMES = ('mailto:', 'tel:', 'javascript:', '#')
+
+
+@lru_cache(maxsize=100_000)
+def normalize_url(url: str) -> str:
+    """Normalize URL to ensure it's properly formatted"""
+    if not url:
+        return ""
+    
+    # Remove whitespace
+    url = url.strip()
+    
+    # Add protocol if missing
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    
+    return url
+
+
+@lru_cache(maxsize=128)
+def _base_netloc(base_domain: str) -> str:
+    """Netloc of a normalized base URL, which rarely changes between calls"""
+    return urlparse(normalize_url(base_domain)).netloc
+
+
+def _make_link_filter(base_netloc: str):
+    """Build a link filter specialized for a single crawl's base domain"""
+    def link_filter(href: str) -> bool:
+        return (
+            not href.startswith(_BAD_SCHEMES) and
+            not SKIP_EXT_RE.search(href) and
+            urlparse(href).netloc == base_netloc
+        )
+    return link_filter
+
+
+# Elements whose text and links are left out of the extracted page content. A browser with
+# scripting on reads noscript bodies as raw markup, and never renders template contents.
+_SKIPPED_TAGS = frozenset({'script', 'style', 'noscript', 'template', 'nav', 'footer', 'header'})
+
+# Runs in the page and returns only what the scraper needs, so the full HTML never crosses to Python
+_EXTRACT_PAGE_JS = """
+() => {
+    const skipped = 'script, style, noscript, template, nav, footer, header';
+    const links = [];
+    const parentTexts = new Map();  // parent element -> text, shared by sibling links
+    // Text under an element with skipped subtrees left out, like the page text below
+    const visibleText = (el) => {
+        const walker = document.createTreeWalker(el, NodeFilter.SHOW_ELEMENT | NodeFilter.SHOW_TEXT, {
+            acceptNode: (node) => node.nodeType === Node.ELEMENT_NODE && node.matches(skipped)
+                ? NodeFilter.FILTER_REJECT : NodeFilter.FILTER_ACCEPT
+        });
+        const parts = [];
+        while (walker.nextNode()) {
+            if (walker.currentNode.nodeType === Node.TEXT_NODE) parts.push(walker.currentNode.nodeValue);
+        }
+        return parts.join(' ');
+    };
+    for (const a of document.querySelectorAll('a[href]')) {
+        if (a.closest(skipped)) continue;
+        const parent = a.parentElement;
+        let parentText = '';
+        if (parent) {
+            parentText = parentTexts.get(parent);
+            if (parentText === undefined) {
+                parentText = visibleText(parent).replace(/\\s+/g, ' ').trim().slice(0, 200);
+                parentTexts.set(parent, parentText);
+            }
+        }
+        // The raw attribute, joined in Python like parsed HTML, not the browser's resolved a.href
+        links.push({href: a.getAttribute('href'), text: a.textContent.trim(), parent: parentText});
+    }
+    const root = document.documentElement.cloneNode(true);
+    root.querySelectorAll(skipped).forEach(el => el.remove());
+    // Join text nodes with spaces so words from adjacent elements stay apart
+    const walker = document.createTreeWalker(root, NodeFilter.SHOW_TEXT);
+    const textParts = [];
+    while (walker.nextNode()) textParts.push(walker.currentNode.nodeValue);
+    const meta = document.querySelector('meta[name="description"]');
+    return {
+        title: document.title.trim(),
+        meta_description: meta ? meta.getAttribute('content') || '' : '',
+        links: links,
+        text: textParts.join(' ')
+    };
+}
+"""
+
+
+def _visible_strings(tag: Tag):
+    """Text nodes under a tag in document order, leaving out skipped elements"""
+    stack = list(reversed(tag.contents))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Tag):
+            if node.name not in _SKIPPED_TAGS:
+                stack.extend(reversed(node.contents))
+        elif type(node) in (NavigableString, CData):
+            yield node
+
+
+def _clean_text(raw: str) -> str:
+    """Collapse every run of whitespace in extracted page text to a single space"""
+    return WHITESPACE_RE.sub(' ', raw).strip()
+
+
+def _text_fields(text: str) -> Dict:
+    """Capped page text plus the word count and hash of the full text"""
+    return {
+        'text': text[:PAGE_CONTENT_MAX_CHARS],
+        'word_count': len(text.split()),
+        'content_hash': hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+    }
+
+
+# Resource types that don't matter for text extraction or link discovery
+_BLOCKED_RESOURCE_TYPES = frozenset({'image', 'media', 'font', 'stylesheet'})
+
+
+async def _block_heavy_resources(route):
+    """Abort requests for resources the scraper doesn't need"""
+    if route.request.resource_type in _BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
 
 class WebsiteScraper:
-    def __init__(self, screenshots_dir: str = "screenshots", enable_link_filtering: bool = False):
+    def __init__(self, screenshots_dir: str = "screenshots", enable_link_filtering: bool = False,
+                 max_concurrency: int = PLAYWRIGHT_MAX_CONCURRENCY,
+                 block_resources: bool = PLAYWRIGHT_BLOCK_RESOURCES,
+                 enable_screenshots: bool = ENABLE_SCREENSHOTS,
+                 screenshot_max_height: int = SCREENSHOT_MAX_HEIGHT,
+                 static_fetch: bool = STATIC_FETCH_ENABLED):
         self.visited_urls: Set[str] = set()
         self.scraped_data: List[Dict] = []
         self.playwright = None
         self.browser: Browser = None
         self.context = None
+        self.max_concurrency = max_concurrency
+        self.block_resources = block_resources
+        self._page_pool: asyncio.Queue = None  # pre-warmed pages, one per concurrent scrape
+        self._live_pages = 0  # pages in the pool or checked out; None is queued once this drops to zero
+        # Static pages don't need Chromium, but screenshots do
+        self.static_fetch = static_fetch and HTTPX_AVAILABLE and not enable_screenshots
+        self._http = None
+        self._screenshot_counter = itertools.count(1)
         self.screenshots_dir = screenshots_dir
+        self.enable_screenshots = enable_screenshots
+        self.screenshot_max_height = screenshot_max_height
         self.enable_link_filtering = enable_link_filtering
         self.link_relevance_agent = LinkRelevanceAgent() if enable_link_filtering else None
         self.target_sections = None
+        self._rate_limiter = HostRateLimiter(CRAWL_MAX_REQUESTS_PER_SECOND)
+        self._link_filter = None  # specialized per crawl in crawl_website
         
         # Create screenshots directory if it doesn't exist
         os.makedirs(self.screenshots_dir, exist_ok=True)
@@ -33,119 +207,189 @@ class WebsiteScraper:
         """Set target sections for link relevance evaluation"""
         self.target_sections = sections
     
-    def filter_links_by_relevance(self, links: List[str], current_page_title: str = "", 
-                                 current_page_content: str = "", context_text: str = "") -> List[Dict]:
-        """Filter links based on relevance using AI agent"""
+    def filter_links_by_relevance(self, links: List[Dict], current_page_title: str = "", 
+                                 current_page_content: str = "") -> List[Dict]:
+        """Filter links based on relevance using AI agent
+        
+        Each link is a dict with 'url' and 'context' (the text around the link on the page).
+        """
         if not self.enable_link_filtering or not self.link_relevance_agent:
             # Return all links as relevant if filtering is disabled
-            return [{'url': link, 'relevance_score': 5, 'is_worth_checking': True} for link in links]
+            return [{'url': link['url'], 'relevance_score': 5, 'is_worth_checking': True} for link in links]
         
         relevant_links = []
         print(f"🔍 Filtering {len(links)} links for relevance...")
         
-        for i, link in enumerate(links):
-            try:
-                # Get context around the link (this would need to be passed from the scraping method)
-                link_context = context_text if context_text else f"Link {i+1} from {current_page_title}"
-                
-                # Evaluate link relevance
-                evaluation = self.link_relevance_agent.evaluate_link_relevance(
-                    url=link,
-                    context=link_context,
-                    current_page_title=current_page_title,
-                    current_page_content=current_page_content,
-                    target_sections=self.target_sections
-                )
-                
-                # Only include links that are worth checking
-                if evaluation.get('is_worth_checking', False):
-                    relevant_links.append(evaluation)
-                    print(f"✅ Link approved: {link} (Score: {evaluation.get('relevance_score', 0)})")
-                else:
-                    print(f"❌ Link rejected: {link} (Score: {evaluation.get('relevance_score', 0)})")
-                    
-            except Exception as e:
-                print(f"⚠️ Error evaluating link {link}: {e}")
-                # Include link by default if evaluation fails
-                relevant_links.append({
-                    'url': link, 
-                    'relevance_score': 5, 
-                    'is_worth_checking': True,
-                    'reasoning': f"Evaluation failed: {str(e)}"
-                })
+        # Only the links closest to the target sections are worth an agent call
+        candidates = self.link_relevance_agent.rank_links(links, self.target_sections)
+        if len(candidates) < len(links):
+            print(f"📐 Evaluating the {len(candidates)} links most similar to the target sections")
         
-        print(f"📊 Link filtering complete: {len(relevant_links)}/{len(links)} links approved")
-        return relevant_links
-        
-    def normalize_url(self, url: str) -> str:
-        """Normalize URL to ensure it's properly formatted"""
-        if not url:
-            return ""
+        try:
+            # Evaluate all of the page's links in a single agent call
+            evaluations = self.link_relevance_agent.evaluate_links_batch(
+                candidates,
+                current_page_title=current_page_title,
+                current_page_content=current_page_content,
+                target_sections=self.target_sections
+            )
+        except Exception as e:
+            print(f"⚠️ Batch link evaluation failed, evaluating links one by one: {e}")
+            evaluations = [
+                self._evaluate_link(link, current_page_title, current_page_content)
+                for link in candidates
+            ]
         
-        # Remove whitespace
-        url = url.strip()
+        for evaluation in evaluations:
+            # Only include links that are worth checking
+            if evaluation.get('is_worth_checking', False):
+                relevant_links.append(evaluation)
+                print(f"✅ Link approved: {evaluation['url']} (Score: {evaluation.get('relevance_score', 0)})")
+            else:
+                print(f"❌ Link rejected: {evaluation['url']} (Score: {evaluation.get('relevance_score', 0)})")
         
-        # Add protocol if missing
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
+        print(f"📊 Link filtering complete: {len(relevant_links)}/{len(links)} links approved")
+        return relevant_links
+    
+    def _evaluate_link(self, link: Dict, current_page_title: str, current_page_content: str) -> Dict:
+        """Evaluate a single link, including it by default if evaluation fails"""
+        try:
+            return self.link_relevance_agent.evaluate_link_relevance(
+                url=link['url'],
+                context=link.get('context', ''),
+                current_page_title=current_page_title,
+                current_page_content=current_page_content,
+                target_sections=self.target_sections
+            )
+        except Exception as e:
+            print(f"⚠️ Error evaluating link {link['url']}: {e}")
+            return {
+                'url': link['url'], 
+                'relevance_score': 5, 
+                'is_worth_checking': True,
+                'reasoning': f"Evaluation failed: {str(e)}"
+            }
         
-        return url
+    # Cached module-level function, so repeated URLs are a dict lookup
+    normalize_url = staticmethod(normalize_url)
     
     def is_valid_url(self, url: str, base_domain: str) -> bool:
-        """Check if URL is valid and belongs to the same domain"""
+        """Check if URL is valid and belongs to the same domain
+        
+        Crawls use the faster per-domain filter from _make_link_filter; this is kept
+        for callers of the public API.
+        """
         try:
+            # Check for mailto, tel and similar links before normalizing adds a protocol
+            if url.strip().startswith(_BAD_SCHEMES):
+                return False
+            
             # Normalize URLs
             url = self.normalize_url(url)
-            base_domain = self.normalize_url(base_domain)
-            
             parsed_url = urlparse(url)
-            parsed_base = urlparse(base_domain)
+            base_netloc = _base_netloc(base_domain)
             
             # Check if it's a valid URL with netloc
-            if not parsed_url.netloc or not parsed_base.netloc:
+            if not parsed_url.netloc or not base_netloc:
                 return False
             
-            # Check if it's the same domain
-            same_domain = parsed_url.netloc == parsed_base.netloc
-            
-            # Check if it's not a file download
-            not_file = not any(ext in url.lower() for ext in ['.pdf', '.doc', '.docx', '.jpg', '.jpeg', '.png', '.gif', '.mp4', '.mp3', '.zip', '.exe'])
-            
-            # Check if it's not a mailto or tel link
-            not_special = not url.lower().startswith(('mailto:', 'tel:', 'javascript:', '#'))
-            
-            return same_domain and not_file and not_special
+            # Same domain and not a file download
+            return parsed_url.netloc == base_netloc and not SKIP_EXT_RE.search(url)
             
         except Exception as e:
             print(f"URL validation error for {url}: {e}")
             return False
     
-    def extract_text_content(self, soup: BeautifulSoup) -> str:
-        """Extract clean text content from BeautifulSoup object"""
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
+    def extract_page_data(self, soup: BeautifulSoup) -> Dict:
+        """Collect title, meta description, links and clean text in a single pass over the tree
+        
+        Text and links inside script, style, noscript, template, nav, footer and header elements are skipped.
+        Links are returned as {'href', 'text', 'parent'} dicts, like _EXTRACT_PAGE_JS.
+        The text is capped at PAGE_CONTENT_MAX_CHARS; word_count and content_hash cover all of it.
+        """
+        title_text = None
+        meta_description = None
+        anchors = []
+        text_parts = []
+        
+        # Depth-first walk in document order, pruning skipped elements
+        stack = list(reversed(soup.contents))
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Tag):
+                if node.name in _SKIPPED_TAGS:
+                    continue
+                if node.name == 'title' and title_text is None:
+                    title_text = node.get_text().strip()
+                elif node.name == 'meta' and meta_description is None and node.get('name') == 'description':
+                    meta_description = node.get('content', '')
+                elif node.name == 'a' and node.has_attr('href'):
+                    anchors.append(node)
+                stack.extend(reversed(node.contents))
+            elif type(node) in (NavigableString, CData):
+                text_parts.append(node)
         
-        # Get text and clean it up
-        text = soup.get_text()
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
+        # Clean up the text
+        text = _clean_text(' '.join(text_parts))
         
-        return text
+        return {
+            'title': title_text or "No title",
+            'meta_description': meta_description or "",
+            'links': self._anchor_links(anchors),
+            **_text_fields(text)
+        }
+    
+    def _anchor_links(self, anchors: List[Tag]) -> List[Dict]:
+        """Turn anchor tags into link dicts with their text and parent context
+        
+        The parent context leaves out skipped elements, so a menu nested next to a link doesn't drown it.
+        """
+        links = []
+        parent_texts = {}  # id(parent) -> text, shared by sibling links
+        for link in anchors:
+            parent = link.parent
+            if parent is None:
+                parent_text = ""
+            elif id(parent) in parent_texts:
+                parent_text = parent_texts[id(parent)]
+            else:
+                parent_text = parent_texts[id(parent)] = _clean_text(' '.join(_visible_strings(parent)))[:200]
+            links.append({'href': link['href'], 'text': link.get_text(strip=True), 'parent': parent_text})
+        return links
+    
+    def parse_html(self, content: str) -> Dict:
+        """Parse HTML and extract its page data"""
+        try:
+            soup = BeautifulSoup(content, 'lxml')
+        except Exception as parse_error:
+            # Fall back to the slower but more lenient pure-Python parser
+            print(f"⚠️ lxml parsing failed, retrying with html5lib: {parse_error}")
+            soup = BeautifulSoup(content, 'html5lib')
+        return self.extract_page_data(soup)
+    
+    async def extract_page_data_in_browser(self, page: Page) -> Dict:
+        """Same result as extract_page_data, computed inside the page instead of from its HTML"""
+        data = await page.evaluate(_EXTRACT_PAGE_JS)
+        text = _clean_text(data['text'])
+        return {
+            'title': data['title'] or "No title",
+            'meta_description': data['meta_description'],
+            'links': data['links'],
+            **_text_fields(text)
+        }
     
-    def start_browser(self):
+    async def start_browser(self):
         """Initialize Playwright browser"""
         if not self.playwright:
             print("🚀 Starting Playwright...")
-            self.playwright = sync_playwright().start()
+            self.playwright = await async_playwright().start()
             print("🌐 Launching Chromium browser...")
-            self.browser = self.playwright.chromium.launch(
+            self.browser = await self.playwright.chromium.launch(
                 headless=PLAYWRIGHT_HEADLESS,
                 args=['--no-sandbox', '--disable-dev-shm-usage', '--disable-blink-features=AutomationControlled']
             )
             print("📄 Creating browser context...")
-            self.context = self.browser.new_context(
+            self.context = await self.browser.new_context(
                 user_agent=USER_AGENT,
                 viewport=PLAYWRIGHT_VIEWPORT,
                 extra_http_headers={
@@ -156,146 +400,281 @@ class WebsiteScraper:
                     'Upgrade-Insecure-Requests': '1',
                 }
             )
+            if self.block_resources:
+                print("🚫 Blocking images, media, fonts and stylesheets...")
+                await self.context.route('**/*', _block_heavy_resources)
+            print(f"📄 Pre-warming {self.max_concurrency} pages...")
+            self._page_pool = asyncio.Queue()
+            for _ in range(self.max_concurrency):
+                self._page_pool.put_nowait(await self._new_page())
+            self._live_pages = self.max_concurrency
             print("✅ Browser ready!")
+        if self.static_fetch and not self._http:
+            self._http = self._new_http_client()
+    
+    def _new_http_client(self):
+        """Create the keep-alive client used for static pages, with HTTP/2 when h2 is installed"""
+        options = dict(
+            headers={'User-Agent': USER_AGENT, 'Accept': 'text/html,application/xhtml+xml,*/*;q=0.8',
+                     'Accept-Language': 'en-US,en;q=0.9'},
+            timeout=REQUEST_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.max_concurrency * 2)
+        )
+        try:
+            return httpx.AsyncClient(http2=True, **options)
+        except ImportError:
+            return httpx.AsyncClient(**options)
     
-    def close_browser(self):
+    async def _new_page(self) -> Page:
+        """Create a page in the shared context"""
+        page = await self.context.new_page()
+        page.set_default_timeout(REQUEST_TIMEOUT * 1000)  # Convert to milliseconds
+        if self.enable_screenshots:
+            # Cap the viewport so screenshots stay small
+            await page.set_viewport_size({
+                'width': PLAYWRIGHT_VIEWPORT['width'],
+                'height': min(PLAYWRIGHT_VIEWPORT['height'], self.screenshot_max_height)
+            })
+        return page
+    
+    async def _release_page(self, page: Page):
+        """Reset a page and return it to the pool, replacing it if it can't be reused
+        
+        Never raises: a page that can't be replaced (e.g. the browser died) is dropped from
+        the pool, and once none are left, waiting scrapes are woken up to fail instead.
+        """
+        try:
+            await page.goto('about:blank')
+        except Exception:
+            try:
+                await page.close()
+            except Exception:
+                pass
+            try:
+                page = await self._new_page()
+            except Exception as e:
+                self._live_pages -= 1
+                print(f"⚠️ Could not replace a browser page, {self._live_pages} left: {e}")
+                if self._live_pages == 0:
+                    self._page_pool.put_nowait(None)
+                return
+        self._page_pool.put_nowait(page)
+    
+    async def close_browser(self):
         """Close Playwright browser"""
         if self.context:
-            self.context.close()
+            await self.context.close()
         if self.browser:
-            self.browser.close()
+            await self.browser.close()
         if self.playwright:
-            self.playwright.stop()
+            await self.playwright.stop()
+        if self._http:
+            await self._http.aclose()
+        self._http = None
+        self.context = None
+        self.browser = None
+        self.playwright = None
+        self._page_pool = None
+        self._live_pages = 0
+    
+    async def scrape_page(self, url: str, known_urls: Set[str] = None) -> Dict:
+        """Scrape a single page using Playwright and return structured data
+        
+        Links already in known_urls (visited or queued) are left out of the result.
+        """
+        page_data, raw_links = await self._scrape(url, known_urls or set())
+        if 'error' not in page_data:
+            page_data['links'] = await self._filter_links(page_data, raw_links)
+        return page_data
+    
+    async def _scrape(self, url: str, known_urls: Set[str]) -> Tuple[Dict, List[Dict]]:
+        """Scrape a page without filtering its links, returning the result and its new links"""
+        # Ensure browser is started
+        if not self.context:
+            print("⚠️ Browser not started, starting now...")
+            await self.start_browser()
+        
+        # Be respectful with requests, only waiting when the host is hit too fast
+        await self._rate_limiter.acquire_async(self.normalize_url(url))
+        
+        # Static pages are fetched without a browser; anything that needs JS falls through
+        if self._http:
+            result = await self._scrape_static(url, known_urls)
+            if result:
+                return result
+        
+        # Checking out a pooled page also bounds the number of pages in flight
+        page = await self._page_pool.get()
+        if page is None:
+            # No browser pages are left; pass the marker on so other waiting scrapes fail too
+            self._page_pool.put_nowait(None)
+            return {
+                'url': url,
+                'error': "No browser pages left, the browser may have crashed",
+                'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S')
+            }, []
+        try:
+            return await self._scrape_page(page, url, known_urls)
+        finally:
+            await self._release_page(page)
     
-    def scrape_page(self, url: str) -> Dict:
-        """Scrape a single page using Playwright and return structured data"""
-        page = None
+    async def _scrape_static(self, url: str, known_urls: Set[str]) -> Tuple[Dict, List[Dict]]:
+        """Scrape a page over plain HTTP, returning None when it needs a browser
+        
+        Non-HTML responses and bodies over MAX_PAGE_BYTES are left to the browser without being read in full.
+        """
+        normalized_url = self.normalize_url(url)
+        try:
+            async with self._http.stream('GET', normalized_url) as response:
+                # Decide from the headers before reading, leaving other content to the browser
+                if response.status_code != 200 or 'html' not in response.headers.get('content-type', ''):
+                    return None
+                if int(response.headers.get('content-length') or 0) > MAX_PAGE_BYTES:
+                    return None
+                
+                chunks = []
+                size = 0
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > MAX_PAGE_BYTES:
+                        return None
+                    chunks.append(chunk)
+                content = b''.join(chunks).decode(response.encoding or 'utf-8', errors='replace')
+                final_url = str(response.url)
+            page_data = await asyncio.to_thread(self.parse_html, content)
+            
+            # A near-empty body usually means the page is rendered by JavaScript
+            if len(page_data['text']) < STATIC_FETCH_MIN_TEXT_LENGTH:
+                return None
+            
+            print(f"⚡ Fetched static page: {normalized_url}")
+            return await self._page_result(url, normalized_url, final_url, page_data, known_urls)
+        except Exception as e:
+            print(f"⚠️ Static fetch failed for {normalized_url}, using the browser: {e}")
+            return None
+    
+    async def _scrape_page(self, page: Page, url: str, known_urls: Set[str]) -> Tuple[Dict, List[Dict]]:
+        """Scrape a single page using a page checked out from the pool"""
         try:
             # Normalize the URL
             normalized_url = self.normalize_url(url)
             print(f"🔗 Navigating to: {normalized_url}")
             
-            # Ensure browser is started
-            if not self.context:
-                print("⚠️ Browser not started, starting now...")
-                self.start_browser()
-            
-            print("📄 Creating new page...")
-            page = self.context.new_page()
-            
-            # Set timeout and navigate
-            page.set_default_timeout(REQUEST_TIMEOUT * 1000)  # Convert to milliseconds
-            
             # Navigate to the page
             print(f"🌐 Loading page: {normalized_url}")
             try:
-                if PLAYWRIGHT_WAIT_FOR_NETWORK_IDLE:
-                    page.goto(normalized_url, wait_until='networkidle')
-                else:
-                    page.goto(normalized_url, wait_until='domcontentloaded')
+                await page.goto(normalized_url, wait_until='domcontentloaded', timeout=REQUEST_TIMEOUT * 1000)
                 print("✅ Page navigation successful!")
             except Exception as nav_error:
                 print(f"❌ Navigation failed: {nav_error}")
                 raise nav_error
             
-            # Wait for content to load
+            # Give JS-rendered pages a moment to produce links, without waiting for network idle
             print("⏳ Waiting for content to load...")
-            page.wait_for_timeout(PLAYWRIGHT_EXTRA_WAIT_TIME)
+            try:
+                await page.wait_for_selector('a[href]', timeout=PLAYWRIGHT_CONTENT_WAIT_TIMEOUT)
+            except PlaywrightTimeoutError:
+                pass
             
             # Get current URL to verify we're on the right page
             current_url = page.url
             print(f"✅ Successfully loaded: {current_url}")
             
-            # Take screenshot
-            print("📸 Taking screenshot...")
-            screenshot_filename = f"screenshot_{len(self.scraped_data) + 1}_{int(time.time())}.png"
-            screenshot_path = os.path.join(self.screenshots_dir, screenshot_filename)
-            page.screenshot(path=screenshot_path, full_page=True)
-            print(f"📸 Screenshot saved: {screenshot_path}")
-            
-            # Get page content
+            # Take screenshot if enabled
+            screenshot_filename = ""
+            screenshot_path = ""
+            if self.enable_screenshots:
+                print("📸 Taking screenshot...")
+                screenshot_filename = f"screenshot_{next(self._screenshot_counter)}_{int(time.time())}.jpg"
+                screenshot_path = os.path.join(self.screenshots_dir, screenshot_filename)
+                screenshot_bytes = await page.screenshot(full_page=False, type='jpeg', quality=SCREENSHOT_JPEG_QUALITY)
+                try:
+                    # Write from a worker thread so the event loop keeps serving other pages
+                    await asyncio.to_thread(Path(screenshot_path).write_bytes, screenshot_bytes)
+                    print(f"📸 Screenshot saved: {screenshot_path}")
+                except OSError as e:
+                    print(f"⚠️ Error writing screenshot {screenshot_path}: {e}")
+                    screenshot_filename = screenshot_path = ""
+            
+            # Extract page information and main content
             print("📖 Getting page content...")
-            content = page.content()
-            soup = BeautifulSoup(content, 'html5lib')
-            
-            # Extract page information
-            title = soup.find('title')
-            title_text = title.get_text().strip() if title else "No title"
-            
-            # Extract main content
-            main_content = self.extract_text_content(soup)
-            
-            # Extract links for further crawling
-            raw_links = []
-            link_contexts = []
-            for link in soup.find_all('a', href=True):
-                href = link['href']
-                # Use the normalized URL for joining
-                full_url = urljoin(normalized_url, href)
-                if self.is_valid_url(full_url, normalized_url):
-                    raw_links.append(full_url)
-                    # Extract context around the link
-                    link_text = link.get_text(strip=True)
-                    parent_text = link.parent.get_text(strip=True) if link.parent else ""
-                    context = f"Link text: '{link_text}' | Parent context: '{parent_text[:200]}'"
-                    link_contexts.append(context)
-            
-            print(f"🔗 Found {len(raw_links)} valid links on this page")
-            
-            # Filter links by relevance if enabled
-            if self.enable_link_filtering and self.link_relevance_agent:
-                filtered_links_data = self.filter_links_by_relevance(
-                    raw_links, 
-                    current_page_title=title_text,
-                    current_page_content=main_content,
-                    context_text="\n".join(link_contexts)
-                )
-                # Extract just the URLs from the filtered data
-                links = [link_data['url'] for link_data in filtered_links_data]
-                print(f"🎯 After relevance filtering: {len(links)} links approved for crawling")
-            else:
-                links = raw_links
-            
-            # Extract meta information
-            meta_description = ""
-            meta_desc_tag = soup.find('meta', attrs={'name': 'description'})
-            if meta_desc_tag:
-                meta_description = meta_desc_tag.get('content', '')
-            
-            # Close the page
-            if page:
-                page.close()
-                print("🔒 Page closed")
-            
-            return {
-                'url': url,
-                'normalized_url': normalized_url,
-                'actual_url': current_url,
-                'title': title_text,
-                'content': main_content,
-                'meta_description': meta_description,
-                'links': links,
-                'word_count': len(main_content.split()),
-                'screenshot_path': screenshot_path,
-                'screenshot_filename': screenshot_filename,
-                'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S')
-            }
+            try:
+                page_data = await self.extract_page_data_in_browser(page)
+            except Exception as eval_error:
+                # Fall back to parsing the rendered HTML in Python
+                print(f"⚠️ In-page extraction failed, parsing HTML instead: {eval_error}")
+                page_data = self.parse_html(await page.content())
+            return await self._page_result(url, normalized_url, current_url, page_data, known_urls,
+                                           screenshot_path, screenshot_filename)
             
         except Exception as e:
             print(f"❌ Error scraping {url}: {e}")
-            if page:
-                try:
-                    page.close()
-                except:
-                    pass
             return {
                 'url': url,
                 'error': str(e),
                 'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S')
-            }
+            }, []
     
-    def crawl_website(self, start_url: str, max_pages: int = MAX_PAGES_TO_SCRAPE, target_sections: List[Dict] = None) -> List[Dict]:
-        """Crawl website starting from start_url using Playwright"""
+    async def _page_result(self, url: str, normalized_url: str, current_url: str, page_data: Dict,
+                           known_urls: Set[str], screenshot_path: str = "", screenshot_filename: str = "") -> Tuple[Dict, List[Dict]]:
+        """Build a page's scrape result and collect its new, valid links"""
+        # Extract links for further crawling
+        link_filter = self._link_filter or _make_link_filter(urlparse(normalized_url).netloc)
+        raw_links = []  # {'url', 'context', 'text', 'parent'} for each new, valid link
+        seen_urls = set()
+        for link in page_data['links']:
+            # Use the normalized URL for joining
+            full_url = self.normalize_url(urljoin(normalized_url, link['href']))
+            # Skip duplicates and known URLs before spending agent calls on them
+            if full_url in seen_urls or full_url in known_urls:
+                continue
+            seen_urls.add(full_url)
+            if link_filter(full_url):
+                # Describe the link by its text and surroundings
+                context = f"Link text: '{link['text']}' | Parent context: '{link['parent']}'"
+                raw_links.append({'url': full_url, 'context': context, 'text': link['text'], 'parent': link['parent']})
+        
+        print(f"🔗 Found {len(raw_links)} new valid links on this page")
+        
+        return {
+            'url': url,
+            'normalized_url': normalized_url,
+            'actual_url': current_url,
+            'title': page_data['title'],
+            'content': page_data['text'],
+            'meta_description': page_data['meta_description'],
+            'links': [link['url'] for link in raw_links],
+            'word_count': page_data['word_count'],
+            'content_hash': page_data['content_hash'],
+            'screenshot_path': screenshot_path,
+            'screenshot_filename': screenshot_filename,
+            'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S')
+        }, raw_links
+    
+    async def _filter_links(self, page_data: Dict, raw_links: List[Dict]) -> List[str]:
+        """URLs of a scraped page's links that are worth crawling"""
+        if not (self.enable_link_filtering and self.link_relevance_agent):
+            return [link['url'] for link in raw_links]
+        
+        # Agent calls block, so keep them off the event loop
+        filtered_links_data = await asyncio.to_thread(
+            self.filter_links_by_relevance,
+            raw_links,
+            current_page_title=page_data['title'],
+            current_page_content=page_data['content']
+        )
+        # Extract just the URLs from the filtered data
+        links = [link_data['url'] for link_data in filtered_links_data]
+        print(f"🎯 After relevance filtering: {len(links)} links approved for crawling")
+        return links
+    
+    async def crawl_website(self, start_url: str, max_pages: int = MAX_PAGES_TO_SCRAPE, target_sections: List[Dict] = None) -> List[Dict]:
+        """Crawl website starting from start_url
+        
+        Scraper workers load pages while filter workers judge the links of pages already
+        loaded, so slow relevance checks overlap with navigation instead of adding to it.
+        """
         self.visited_urls.clear()
         self.scraped_data.clear()
         
@@ -309,42 +688,90 @@ class WebsiteScraper:
             normalized_start_url = self.normalize_url(start_url)
             print(f"🚀 Starting crawl from: {normalized_start_url}")
             
-            # Start browser
-            self.start_browser()
-            
-            urls_to_visit = [normalized_start_url]
+            # Specialize link validation for this crawl's domain
+            self._link_filter = _make_link_filter(urlparse(normalized_start_url).netloc)
             
-            while urls_to_visit and len(self.visited_urls) < max_pages:
-                current_url = urls_to_visit.pop(0)
-                
-                # Normalize the current URL
-                normalized_current_url = self.normalize_url(current_url)
-                
-                if normalized_current_url in self.visited_urls:
-                    continue
-                    
-                self.visited_urls.add(normalized_current_url)
-                
-                print(f"📄 Scraping: {normalized_current_url}")
-                page_data = self.scrape_page(normalized_current_url)
-                self.scraped_data.append(page_data)
-                
-                # Add new links to visit
-                if 'links' in page_data and 'error' not in page_data:
-                    for link in page_data['links']:
-                        normalized_link = self.normalize_url(link)
-                        if normalized_link not in self.visited_urls and normalized_link not in urls_to_visit:
-                            urls_to_visit.append(normalized_link)
-                
-                # Be respectful with requests
-                time.sleep(1)
+            # Start browser
+            await self.start_browser()
+            
+            # FIFO frontier, plus every URL ever queued for O(1) membership checks
+            frontier = asyncio.Queue()
+            scraped = asyncio.Queue()  # (page_data, raw_links) waiting for link filtering
+            frontier.put_nowait(normalized_start_url)
+            queued = {normalized_start_url}
+            
+            # URLs queued or still being processed; the crawl is over when this drops to zero
+            in_flight = 1
+            finished = asyncio.Event()
+            
+            def enqueue(url: str):
+                nonlocal in_flight
+                in_flight += 1
+                queued.add(url)
+                frontier.put_nowait(url)
+            
+            def task_done():
+                nonlocal in_flight
+                in_flight -= 1
+                if in_flight == 0:
+                    finished.set()
+            
+            async def scraper_worker():
+                while True:
+                    current_url = await frontier.get()
+                    # Pages that don't fit within max_pages are dropped
+                    if len(self.visited_urls) >= max_pages:
+                        task_done()
+                        continue
+                    self.visited_urls.add(current_url)
+                    print(f"📄 Scraping: {current_url}")
+                    try:
+                        # Visited URLs were all queued first, so queued covers both
+                        scraped.put_nowait(await self._scrape(current_url, queued))
+                    except Exception as e:
+                        print(f"❌ Error scraping {current_url}: {e}")
+                        task_done()
+            
+            async def filter_worker():
+                while True:
+                    page_data, raw_links = await scraped.get()
+                    try:
+                        if 'error' not in page_data:
+                            try:
+                                page_data['links'] = await self._filter_links(page_data, raw_links)
+                            except Exception as e:
+                                # Prefer crawling unfiltered links over losing the page
+                                print(f"⚠️ Link filtering failed for {page_data['url']}, keeping all links: {e}")
+                                page_data['links'] = [link['url'] for link in raw_links]
+                        self.scraped_data.append(page_data)
+                        
+                        # Add new links to visit
+                        for link in page_data.get('links', []):
+                            normalized_link = self.normalize_url(link)
+                            if normalized_link not in queued:
+                                enqueue(normalized_link)
+                    except Exception as e:
+                        # A dead filter worker would leave pages in scraped forever and hang the crawl
+                        print(f"❌ Error processing links of {page_data.get('url')}: {e}")
+                    finally:
+                        task_done()
+            
+            workers = [asyncio.create_task(scraper_worker()) for _ in range(self.max_concurrency)]
+            workers += [asyncio.create_task(filter_worker()) for _ in range(LINK_FILTER_WORKERS)]
+            try:
+                await finished.wait()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
             
             print(f"✅ Crawling completed. Scraped {len(self.scraped_data)} pages.")
             return self.scraped_data
             
         finally:
             # Always close browser when done
-            self.close_browser()
+            self._link_filter = None
+            await self.close_browser()
 
 
 class PageAnalystAgent:
@@ -372,38 +799,14 @@ class PageAnalystAgent:
             """
         )
     
-    def _run_agent_in_thread(self, prompt: str):
-        """Run the page analyst agent in a separate thread with its own event loop"""
-        import threading
-        import asyncio
-
-        result = [None]
-        error = [None]
-
-        def run_agent():
-            try:
-                # Create a new event loop for this thread
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-
-                # Run the agent
-                result[0] = Runner.run_sync(self.agent, prompt)
-
-            except Exception as e:
-                error[0] = e
-                print(f"Error running page analyst agent: {e}")
-            finally:
-                if 'loop' in locals():
-                    loop.close()
-
-        # Run in a separate thread
-        thread = threading.Thread(target=run_agent)
-        thread.start()
-        thread.join()
-
-        if error[0]:
-            raise error[0]
-        return result[0]
+    def _run_agent(self, prompt: str):
+        """Run the page analyst agent on the shared background event loop"""
+        # Calls from several threads share the loop (and its HTTP connections) concurrently
+        try:
+            return run_on_shared_loop(Runner.run(self.agent, prompt))
+        except Exception as e:
+            print(f"Error running page analyst agent: {e}")
+            raise
     
     def analyze_section_pages(self, section: Dict, subsection: Dict, all_pages: List[Dict]) -> List[Dict]:
         """Analyze which pages belong to a specific section/subsection using AI"""
@@ -414,13 +817,16 @@ class PageAnalystAgent:
             subsection_definition = subsection['subsection_definition']
             
             # Prepare all pages for analysis
-            pages_text = ""
+            page_parts = []
             for i, page in enumerate(all_pages):
                 if 'error' in page:
                     continue
-                pages_text += f"\n{i+1}. {page.get('title', 'No title')}\n"
-                pages_text += f"   URL: {page.get('url', '')}\n"
-                pages_text += f"   Content: {page.get('content', '')[:1500]}...\n"
+                page_parts.append(
+                    f"\n{i+1}. {page.get('title', 'No title')}\n"
+                    f"   URL: {page.get('url', '')}\n"
+                    f"   Content: {page.get('content', '')[:1500]}...\n"
+                )
+            pages_text = ''.join(page_parts)
             
             prompt = f"""
             You are analyzing which web pages belong to a specific organizational section and subsection.
@@ -443,12 +849,15 @@ class PageAnalystAgent:
             5. Supporting quotes from the content
             6. Confidence level in your assessment (high/medium/low)
             
+            Identify each page by "page_index", the number shown before it in PAGES TO EVALUATE.
+            
             Format your response as JSON with this structure:
             {{
                 "section_name": "{section_name}",
                 "subsection_name": "{subsection_name}",
                 "relevant_pages": [
                     {{
+                        "page_index": 1,
                         "page_title": "Page Title",
                         "page_url": "https://example.com",
                         "belongs_to_subsection": true,
@@ -459,6 +868,7 @@ class PageAnalystAgent:
                         "confidence": "high"
                     }},
                     {{
+                        "page_index": 2,
                         "page_title": "Another Page",
                         "page_url": "https://example.com/page2",
                         "belongs_to_subsection": false,
@@ -473,7 +883,7 @@ class PageAnalystAgent:
             """
             
             print(f"🤖 Analyzing section '{subsection_name}' for relevant pages...")
-            result = self._run_agent_in_thread(prompt)
+            result = self._run_agent(prompt)
             analysis = result.final_output
             
             # Try to parse JSON response
@@ -489,16 +899,18 @@ class PageAnalystAgent:
                 
                 parsed_analysis = json.loads(json_str)
                 
+                # Pages are numbered in the prompt, so look them up by that number
+                pages_by_index = {i + 1: page for i, page in enumerate(all_pages) if 'error' not in page}
+                
                 # Convert to the format expected by the UI
                 relevant_pages = []
                 for page_analysis in parsed_analysis.get('relevant_pages', []):
                     if page_analysis.get('belongs_to_subsection', False) and page_analysis.get('relevance_score', 0) >= 3:
                         # Find the original page data
-                        original_page = None
-                        for page in all_pages:
-                            if page.get('title') == page_analysis.get('page_title'):
-                                original_page = page
-                                break
+                        try:
+                            original_page = pages_by_index.get(int(page_analysis.get('page_index')))
+                        except (TypeError, ValueError):
+                            original_page = None
                         
                         if original_page:
                             relevant_pages.append({
@@ -528,17 +940,66 @@ class PageAnalystAgent:
             return []
 
 
+@lru_cache(maxsize=8)
+def _load_sections_config(config_path: str, mtime: float) -> Dict:
+    """Parse a sections config file; keyed on mtime so edits are picked up"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+_PLACEHOLDER_RE = re.compile(r'\[[^\]]*\]')
+_WORD_RE = re.compile(r'[a-z]{4,}')
+_STOPWORDS = frozenset("""
+    about also and any are been being both but can could does each etc for from have how include includes
+    including information into its like more most much must other over page pages related relevant should
+    such than that the their them then there these they this those through under using various what when
+    where which while with within would your
+""".split())
+
+
+def _keyword_stem(word: str) -> str:
+    """Shortest common prefix of a word's singular and plural forms, e.g. polic for policy/policies"""
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3]
+    if len(word) > 4 and word.endswith('y'):
+        return word[:-1]
+    if word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def extract_keywords(sections: List[Dict]) -> Set[str]:
+    """Distinctive words from the section and subsection names and definitions of a sections config
+    
+    Placeholders such as [organization name] are left out, since the organization's
+    name appears on nearly every page of its site.
+    """
+    keywords = set()
+    for section in sections:
+        texts = [section.get('section_name', ''), section.get('section_definition', '')]
+        for subsection in section.get('subsection', []):
+            texts += [subsection.get('subsection_name', ''), subsection.get('subsection_definition', '')]
+        for text in texts:
+            for word in _WORD_RE.findall(_PLACEHOLDER_RE.sub(' ', text).lower()):
+                if word in _STOPWORDS:
+                    continue
+                # Keywords match as word prefixes, so a stem covers both singular and plural
+                keywords.add(_keyword_stem(word))
+    return keywords
+
+
 class SectionBasedAnalyzer:
     def __init__(self, sections_config_path: str = "settings/crawl_sections.json", enable_link_filtering: bool = False):
         self.sections_config = self.load_sections_config(sections_config_path)
+        self._resolved_sections: Dict[str, List[Dict]] = {}  # organization name -> sections config
+        self._keyword_matcher: KeywordMatcher = None  # built on first analysis
         self.scraper = WebsiteScraper(enable_link_filtering=enable_link_filtering)
         self.page_analyst = PageAnalystAgent()
         
     def load_sections_config(self, config_path: str) -> Dict:
         """Load the sections configuration from JSON file"""
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return _load_sections_config(config_path, os.path.getmtime(config_path))
         except FileNotFoundError:
             print(f"⚠️ Sections config file not found: {config_path}")
             return {"sections": []}
@@ -546,11 +1007,11 @@ class SectionBasedAnalyzer:
             print(f"❌ Error loading sections config: {e}")
             return {"sections": []}
     
-    def analyze_content_for_sections(self, scraped_data: List[Dict], organization_name: str = "") -> Dict:
-        """Analyze scraped content and organize it by sections using AI section-centric analysis"""
-        print("🔍 Analyzing content for sections using AI section-centric analysis...")
+    def get_sections_config(self, organization_name: str = "") -> List[Dict]:
+        """Sections config with the organization name filled in, built once per name"""
+        if organization_name in self._resolved_sections:
+            return self._resolved_sections[organization_name]
         
-        # Prepare sections configuration
         sections_config = []
         for section in self.sections_config.get('sections', []):
             section_name = section['section_name']
@@ -575,42 +1036,73 @@ class SectionBasedAnalyzer:
                 'subsections': subsections
             })
         
-        # Analyze each section and find relevant pages
-        sections = []
-        total_subsections = sum(len(section.get('subsections', [])) for section in sections_config)
-        current_subsection = 0
+        self._resolved_sections[organization_name] = sections_config
+        return sections_config
+    
+    def analyze_content_for_sections(self, scraped_data: List[Dict], organization_name: str = "") -> Dict:
+        """Analyze scraped content and organize it by sections using AI section-centric analysis"""
+        print("🔍 Analyzing content for sections using AI section-centric analysis...")
         
+        # Prepare sections configuration
+        sections_config = self.get_sections_config(organization_name)
+        
+        # Pages that mention none of the sections' terms can't belong to any of them
+        candidate_pages = [page for page in scraped_data if 'error' not in page]
+        if SECTION_KEYWORD_PREFILTER and candidate_pages:
+            if self._keyword_matcher is None:
+                self._keyword_matcher = KeywordMatcher(extract_keywords(self.sections_config.get('sections', [])))
+            if self._keyword_matcher.keywords:
+                matching_pages = [
+                    page for page in candidate_pages
+                    if self._keyword_matcher.matches(f"{page.get('title', '')} {page.get('content', '')}")
+                ]
+                if matching_pages:
+                    print(f"🔎 {len(candidate_pages) - len(matching_pages)} pages mention no section terms and are skipped")
+                    candidate_pages = matching_pages
+                else:
+                    # Likely a site in another language than the sections config
+                    print("🔎 No page mentions a section term, analyzing all pages")
+        
+        # Analyze all subsections concurrently, since each one is an independent agent call
+        pairs = [
+            (section_config, subsection_config)
+            for section_config in sections_config
+            for subsection_config in section_config.get('subsections', [])
+        ]
+        total_subsections = len(pairs)
+        print(f"🔍 Analyzing {total_subsections} subsections with up to {ANALYSIS_MAX_WORKERS} workers...")
+        
+        if candidate_pages:
+            with ThreadPoolExecutor(max_workers=ANALYSIS_MAX_WORKERS) as executor:
+                futures = [
+                    executor.submit(self.page_analyst.analyze_section_pages, section_config, subsection_config, candidate_pages)
+                    for section_config, subsection_config in pairs
+                ]
+                for completed, _ in enumerate(as_completed(futures), 1):
+                    # Show progress
+                    progress = (completed / total_subsections) * 100
+                    print(f"  🔄 Analysis Progress: {progress:.1f}%")
+            subsection_results = iter([future.result() for future in futures])
+        else:
+            # No page was scraped successfully, so there is nothing to ask the agent about
+            subsection_results = iter([[] for _ in pairs])
+        
+        # Reassemble the results into the sections/subsections tree
+        sections = []
         for section_config in sections_config:
             section_name = section_config['section_name']
             section_definition = section_config['section_definition']
             
-            print(f"\n📋 Analyzing section: {section_name}")
+            print(f"\n📋 Section analyzed: {section_name}")
             
             # Process subsections
             subsections = []
             for subsection_config in section_config.get('subsections', []):
-                current_subsection += 1
-                subsection_name = subsection_config['subsection_name']
-                subsection_definition = subsection_config['subsection_definition']
-                
-                print(f"  🔍 Analyzing subsection {current_subsection}/{total_subsections}: {subsection_name}")
-                
-                # Use AI to find pages that belong to this subsection
-                relevant_pages = self.page_analyst.analyze_section_pages(
-                    section_config, 
-                    subsection_config, 
-                    scraped_data
-                )
-                
                 subsections.append({
-                    'subsection_name': subsection_name,
-                    'subsection_definition': subsection_definition,
-                    'relevant_pages': relevant_pages
+                    'subsection_name': subsection_config['subsection_name'],
+                    'subsection_definition': subsection_config['subsection_definition'],
+                    'relevant_pages': next(subsection_results)
                 })
-                
-                # Show progress
-                progress = (current_subsection / total_subsections) * 100
-                print(f"  🔄 Analysis Progress: {progress:.1f}%")
             
             # Calculate section-level statistics
             total_pages = sum(len(subsection.get('relevant_pages', [])) for subsection in subsections)
@@ -635,13 +1127,37 @@ class SectionBasedAnalyzer:
             'organization_name': organization_name,
             'sections': sections,
             'total_pages_scraped': len(scraped_data),
+            'pages_analyzed': len(candidate_pages),
             'analysis_timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
             'analysis_method': 'AI Section-Centric Analyst'
         }
     
 
 
+class LinkVerdict(BaseModel):
+    """Structured relevance verdict for one link"""
+    relevance_score: int
+    reasoning: str
+    confidence: Literal['high', 'medium', 'low']
+    priority: Literal['high', 'medium', 'low']
+    predicted_content_type: str
+    key_indicators: List[str]
+    is_worth_checking: bool
+
+
+class IndexedLinkVerdict(LinkVerdict):
+    """Link verdict in a batch, identified by the link's index in the prompt"""
+    index: int
+
+
 class LinkRelevanceAgent:
+    # Verdict cache shared by all instances, opened lazily
+    _cache: LinkVerdictCache = None
+    _cache_lock = threading.Lock()
+    # Embedding model shared by all instances, loaded on first use; False if it can't be loaded
+    _embedder = None
+    _embedder_lock = threading.Lock()
+    
     def __init__(self):
         self.agent = Agent(
             name="LinkRelevanceAnalyst",
@@ -674,45 +1190,199 @@ class LinkRelevanceAgent:
             - Suggested priority level for crawling (high/medium/low)
             
             Be conservative but not overly restrictive. Prefer false positives over false negatives.
-            """
+            """,
+            output_type=LinkVerdict
         )
+        # Same agent, answering for a whole batch of links at once
+        self.batch_agent = self.agent.clone(output_type=List[IndexedLinkVerdict])
+        self._sections_info_cache: Dict[str, str] = {}  # sections as JSON -> prompt fragment
+        self._section_embeddings: Dict[str, object] = {}  # sections as JSON -> embeddings of their definitions
     
-    def _run_agent_in_thread(self, prompt: str):
-        """Run the link relevance agent in a separate thread with its own event loop"""
-        import threading
-        import asyncio
-
-        result = [None]
-        error = [None]
-
-        def run_agent():
-            try:
-                # Create a new event loop for this thread
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-
-                # Run the agent
-                result[0] = Runner.run_sync(self.agent, prompt)
-
-            except Exception as e:
-                error[0] = e
-                print(f"Error running link relevance agent: {e}")
-            finally:
-                if 'loop' in locals():
-                    loop.close()
-
-        # Run in a separate thread
-        thread = threading.Thread(target=run_agent)
-        thread.start()
-        thread.join()
-
-        if error[0]:
-            raise error[0]
-        return result[0]
+    def _run_agent(self, prompt: str, agent: Agent = None):
+        """Run the link relevance agent on the shared background event loop"""
+        try:
+            return run_on_shared_loop(Runner.run(agent or self.agent, prompt))
+        except Exception as e:
+            print(f"Error running link relevance agent: {e}")
+            raise
+    
+    @classmethod
+    def _get_cache(cls) -> LinkVerdictCache:
+        """Return the shared verdict cache, loading it from disk on first use"""
+        with cls._cache_lock:
+            if cls._cache is None:
+                cls._cache = LinkVerdictCache(LINK_RELEVANCE_CACHE_PATH)
+            return cls._cache
+    
+    @classmethod
+    def _get_embedder(cls):
+        """Return the shared sentence embedding model, or None without sentence-transformers"""
+        with cls._embedder_lock:
+            if cls._embedder is None:
+                cls._embedder = False
+                if SENTENCE_TRANSFORMERS_AVAILABLE:
+                    try:
+                        cls._embedder = SentenceTransformer(LINK_EMBEDDING_MODEL)
+                    except Exception as e:
+                        print(f"⚠️ Could not load embedding model, evaluating all links: {e}")
+            return cls._embedder or None
+    
+    def rank_links(self, links: List[Dict], target_sections: List[Dict] = None,
+                   top_k: int = LINK_RELEVANCE_TOP_K) -> List[Dict]:
+        """The top_k links most similar to the target sections, in page order
+        
+        Links are compared by URL, text and surrounding text using sentence embeddings.
+        Without sentence-transformers, or if embedding fails, all links are returned,
+        since cruder similarity measures reject relevant links.
+        """
+        if not top_k or len(links) <= top_k or not target_sections:
+            return links
+        embedder = self._get_embedder()
+        if embedder is None:
+            return links
+        
+        section_texts = []
+        for section in target_sections:
+            section_texts.append(f"{section.get('section_name', '')}: {section.get('section_definition', '')}")
+            for subsection in section.get('subsections', []):
+                section_texts.append(
+                    f"{subsection.get('subsection_name', '')}: {subsection.get('subsection_definition', '')}"
+                )
+        link_texts = [
+            f"{link['url']} {link['text']} {link['parent']}" if 'text' in link else f"{link['url']} {link.get('context', '')}"
+            for link in links
+        ]
+        
+        try:
+            key = json.dumps(target_sections, sort_keys=True)
+            section_embeddings = self._section_embeddings.get(key)
+            if section_embeddings is None:
+                section_embeddings = self._section_embeddings[key] = embedder.encode(
+                    section_texts, normalize_embeddings=True
+                )
+            link_embeddings = embedder.encode(link_texts, batch_size=64, normalize_embeddings=True)
+            scores = (link_embeddings @ section_embeddings.T).max(axis=1).tolist()
+        except Exception as e:
+            print(f"⚠️ Link ranking failed, evaluating all links: {e}")
+            return links
+        
+        top = set(sorted(range(len(links)), key=scores.__getitem__, reverse=True)[:top_k])
+        return [link for i, link in enumerate(links) if i in top]
+    
+    def _sections_key(self, target_sections: List[Dict] = None) -> str:
+        """Cache key part for the sections a link is judged against"""
+        return '|'.join(section.get('section_name', '') for section in target_sections or [])
+    
+    def _format_sections_info(self, target_sections: List[Dict] = None) -> str:
+        """Describe the target sections for inclusion in a prompt, formatting each configuration once"""
+        if not target_sections:
+            return ""
+        key = json.dumps(target_sections, sort_keys=True)
+        sections_info = self._sections_info_cache.get(key)
+        if sections_info is None:
+            lines = ["\nTarget sections to look for:\n"]
+            for section in target_sections:
+                lines.append(f"- {section.get('section_name', '')}: {section.get('section_definition', '')}\n")
+                for subsection in section.get('subsections', []):
+                    lines.append(f"  - {subsection.get('subsection_name', '')}: {subsection.get('subsection_definition', '')}\n")
+            sections_info = self._sections_info_cache[key] = ''.join(lines)
+        return sections_info
+    
+    def evaluate_links_batch(self, links: List[Dict], current_page_title: str = "",
+                             current_page_content: str = "", target_sections: List[Dict] = None) -> List[Dict]:
+        """Evaluate all links from a page with one agent call per LINK_RELEVANCE_BATCH_SIZE links
+        
+        Each link is a dict with 'url' and 'context'. Raises an exception if the agent call
+        fails, so callers can fall back to evaluating links one at a time.
+        """
+        if not links:
+            return []
+        
+        # Reuse verdicts for links seen before and only ask about the rest
+        cache = self._get_cache()
+        sections_key = self._sections_key(target_sections)
+        cached = {}
+        for link in links:
+            verdict = cache.get(link['url'], sections_key)
+            if verdict is not None:
+                cached[link['url']] = dict(verdict, url=link['url'])
+        if cached:
+            print(f"💾 Reusing cached relevance for {len(cached)} of {len(links)} links")
+        
+        candidates = [
+            {'index': i + 1, 'url': link['url'], 'context': link.get('context', '')}
+            for i, link in enumerate(link for link in links if link['url'] not in cached)
+        ]
+        if not candidates:
+            return [cached[link['url']] for link in links]
+        
+        # Unchanging instructions come first so provider-side prompt caching can reuse the prefix
+        prompt_prefix = f"""
+            Evaluate the relevance of each of the links below for organizational information gathering.
+            {self._format_sections_info(target_sections)}
+            Return one evaluation per link, identified by its index, with:
+            1. Relevance score (1-10)
+            2. Whether it is worth checking
+            3. Confidence level (high/medium/low)
+            4. Priority level for crawling (high/medium/low)
+            5. Brief reasoning for your decision
+            6. Predicted content type based on URL structure
+            7. Key indicators that suggest relevance
+            
+            Current page title: {current_page_title}
+            Current page content preview: {current_page_content[:500]}...
+            """
+        
+        chunks = [candidates[i:i + LINK_RELEVANCE_BATCH_SIZE]
+                  for i in range(0, len(candidates), LINK_RELEVANCE_BATCH_SIZE)]
+        print(f"🔍 Evaluating relevance of {len(candidates)} links in {len(chunks)} batch(es)")
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            chunk_results = list(executor.map(lambda chunk: self._evaluate_chunk(prompt_prefix, chunk), chunks))
+        
+        # Re-associate evaluations with their links by index
+        evaluations_by_index = {}
+        for chunk_result in chunk_results:
+            evaluations_by_index.update(chunk_result)
+        
+        for candidate in candidates:
+            evaluation = evaluations_by_index.get(candidate['index'])
+            if evaluation is None:
+                # Prefer false positives over dropping a link the model skipped
+                cached[candidate['url']] = {
+                    'url': candidate['url'],
+                    'relevance_score': 5,
+                    'reasoning': "Link missing from batch evaluation",
+                    'confidence': 'low',
+                    'priority': 'low',
+                    'predicted_content_type': 'Unknown',
+                    'key_indicators': [],
+                    'is_worth_checking': True
+                }
+                continue
+            verdict = evaluation.model_dump(exclude={'index'})
+            cache.put(candidate['url'], verdict, sections_key)
+            cached[candidate['url']] = dict(verdict, url=candidate['url'])
+        
+        return [cached[link['url']] for link in links]
+    
+    def _evaluate_chunk(self, prompt_prefix: str, candidates: List[Dict]) -> Dict[int, IndexedLinkVerdict]:
+        """Evaluate one batch of indexed candidates, returning verdicts by index"""
+        prompt = f"""{prompt_prefix}
+            LINKS TO EVALUATE:
+            {json.dumps(candidates, ensure_ascii=False, indent=2)}
+            """
+        result = self._run_agent(prompt, self.batch_agent)
+        return {verdict.index: verdict for verdict in result.final_output}
     
     def evaluate_link_relevance(self, url: str, context: str = "", current_page_title: str = "", 
                               current_page_content: str = "", target_sections: List[Dict] = None) -> Dict:
         """Evaluate if a link is worth checking based on URL and context"""
+        cache = self._get_cache()
+        sections_key = self._sections_key(target_sections)
+        verdict = cache.get(url, sections_key)
+        if verdict is not None:
+            return dict(verdict, url=url)
+        
         try:
             # Prepare context information
             context_info = f"Current page title: {current_page_title}\n"
@@ -720,23 +1390,12 @@ class LinkRelevanceAgent:
             context_info += f"Current page content preview: {current_page_content[:500]}...\n"
             
             # Add target sections if provided
-            sections_info = ""
-            if target_sections:
-                sections_info = "\nTarget sections to look for:\n"
-                for section in target_sections:
-                    sections_info += f"- {section.get('section_name', '')}: {section.get('section_definition', '')}\n"
-                    for subsection in section.get('subsections', []):
-                        sections_info += f"  - {subsection.get('subsection_name', '')}: {subsection.get('subsection_definition', '')}\n"
+            sections_info = self._format_sections_info(target_sections)
             
+            # Unchanging instructions come first so provider-side prompt caching can reuse the prefix
             prompt = f"""
-            Evaluate the relevance of this link for organizational information gathering:
-            
-            URL: {url}
-            
-            {context_info}
-            
+            Evaluate the relevance of the link below for organizational information gathering.
             {sections_info}
-            
             Please analyze this link and provide:
             1. Relevance score (1-10)
             2. Detailed reasoning for your decision
@@ -746,62 +1405,19 @@ class LinkRelevanceAgent:
             6. Predicted content type based on URL structure
             7. Key indicators that suggest relevance
             
-            Format your response as JSON:
-            {{
-                "url": "{url}",
-                "relevance_score": 7,
-                "reasoning": "Detailed explanation of why this link is relevant...",
-                "confidence": "high",
-                "priority": "medium",
-                "predicted_content_type": "About page or organizational information",
-                "key_indicators": ["about", "organization", "mission"],
-                "is_worth_checking": true
-            }}
+            URL: {url}
+            
+            {context_info}
             """
             
             print(f"🔍 Evaluating link relevance: {url}")
-            result = self._run_agent_in_thread(prompt)
-            analysis = result.final_output
+            result = self._run_agent(prompt)
+            
+            # The agent's output type guarantees a complete, typed verdict
+            verdict = result.final_output.model_dump()
+            cache.put(url, verdict, sections_key)
+            return dict(verdict, url=url)
             
-            # Try to parse JSON response
-            try:
-                import json
-                # Extract JSON from the response (it might be wrapped in markdown)
-                if "```json" in analysis:
-                    json_start = analysis.find("```json") + 7
-                    json_end = analysis.find("```", json_start)
-                    json_str = analysis[json_start:json_end].strip()
-                else:
-                    json_str = analysis
-                
-                parsed_analysis = json.loads(json_str)
-                
-                # Ensure all required fields are present
-                return {
-                    'url': url,
-                    'relevance_score': parsed_analysis.get('relevance_score', 0),
-                    'reasoning': parsed_analysis.get('reasoning', 'No reasoning provided'),
-                    'confidence': parsed_analysis.get('confidence', 'medium'),
-                    'priority': parsed_analysis.get('priority', 'low'),
-                    'predicted_content_type': parsed_analysis.get('predicted_content_type', 'Unknown'),
-                    'key_indicators': parsed_analysis.get('key_indicators', []),
-                    'is_worth_checking': parsed_analysis.get('is_worth_checking', False)
-                }
-                
-            except Exception as e:
-                print(f"Error parsing link relevance response as JSON: {e}")
-                # Fallback to basic analysis
-                return {
-                    'url': url,
-                    'relevance_score': 5,
-                    'reasoning': f"Could not parse AI response: {analysis}",
-                    'confidence': 'low',
-                    'priority': 'low',
-                    'predicted_content_type': 'Unknown',
-                    'key_indicators': [],
-                    'is_worth_checking': True  # Default to checking if we can't parse
-                }
-                
         except Exception as e:
             print(f"Error in link relevance evaluation: {e}")
             return {
@@ -850,70 +1466,23 @@ class UniversityInfoAgent:
             """
         )
     
-    def _run_agent_in_thread(self, prompt: str):
-        """Run the OpenAI agent in a separate thread with its own event loop"""
-        import threading
-        import asyncio
-        
-        result = [None]
-        error = [None]
-        
-        def run_agent():
-            try:
-                # Create a new event loop for this thread
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                
-                # Run the agent
-                result[0] = Runner.run_sync(self.agent, prompt)
-                
-            except Exception as e:
-                error[0] = e
-                print(f"Error running agent: {e}")
-            finally:
-                if 'loop' in locals():
-                    loop.close()
-        
-        # Run in a separate thread
-        thread = threading.Thread(target=run_agent)
-        thread.start()
-        thread.join()
-        
-        if error[0]:
-            raise error[0]
-        return result[0]
+    def _run_agent(self, prompt: str):
+        """Run the OpenAI agent on the shared background event loop"""
+        try:
+            return run_on_shared_loop(Runner.run(self.agent, prompt))
+        except Exception as e:
+            print(f"Error running agent: {e}")
+            raise
     
     def collect_university_info(self, university_url: str, max_pages: int = 20, organization_name: str = "") -> Dict:
         """Main method to collect university information with section-based analysis"""
         print(f"Starting to collect information from: {university_url}")
         
         # Prepare sections configuration for link relevance evaluation
-        sections_config = []
-        for section in self.section_analyzer.sections_config.get('sections', []):
-            section_name = section['section_name']
-            if '[organization name]' in section_name and organization_name:
-                section_name = section_name.replace('[organization name]', organization_name)
-            
-            # Process subsections
-            subsections = []
-            for subsection in section.get('subsection', []):
-                subsection_name = subsection['subsection_name']
-                if '[organization name]' in subsection_name and organization_name:
-                    subsection_name = subsection_name.replace('[organization name]', organization_name)
-                
-                subsections.append({
-                    'subsection_name': subsection_name,
-                    'subsection_definition': subsection['subsection_definition']
-                })
-            
-            sections_config.append({
-                'section_name': section_name,
-                'section_definition': section['section_definition'],
-                'subsections': subsections
-            })
+        sections_config = self.section_analyzer.get_sections_config(organization_name)
         
         # Scrape the website with target sections for link relevance evaluation
-        scraped_data = self.scraper.crawl_website(university_url, max_pages, sections_config)
+        scraped_data = asyncio.run(self.scraper.crawl_website(university_url, max_pages, sections_config))
         
         # Extract organization name from first page if not provided
         if not organization_name and scraped_data:
@@ -935,11 +1504,17 @@ class UniversityInfoAgent:
         
         # Also run traditional AI analysis for comparison
         print("🤖 Running traditional AI analysis...")
-        combined_content = ""
-        for page in scraped_data:
-            if 'content' in page and 'error' not in page:
-                combined_content += f"\n\n--- Page: {page['title']} ({page['url']}) ---\n"
-                combined_content += page['content'][:2000]  # Limit content per page
+        # Template pages that say the same thing only cost tokens, so send one of each
+        analyzed_pages, near_duplicates = drop_near_duplicates(
+            [page for page in scraped_data if 'content' in page and 'error' not in page],
+            NEAR_DUPLICATE_MAX_DISTANCE
+        )
+        if near_duplicates:
+            print(f"🧹 Skipping {len(near_duplicates)} near-duplicate pages")
+        combined_content = ''.join(
+            f"\n\n--- Page: {page['title']} ({page['url']}) ---\n{page['content'][:2000]}"  # Limit content per page
+            for page in analyzed_pages
+        )
         
         prompt = f"""
         Analyze the following university website content and extract relevant information in a structured format.
@@ -963,7 +1538,7 @@ class UniversityInfoAgent:
         """
         
         try:
-            result = self._run_agent_in_thread(prompt)
+            result = self._run_agent(prompt)
             traditional_analysis = result.final_output
         except Exception as e:
             print(f"⚠️ Traditional AI analysis failed: {e}")
@@ -976,6 +1551,7 @@ class UniversityInfoAgent:
             'raw_data': scraped_data,
             'section_analysis': section_analysis,
             'traditional_analysis': traditional_analysis,
+            'near_duplicates_skipped': len(near_duplicates),
             'collection_timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
         }
     
@@ -1,97 +1,268 @@
 """
-Alternative website scraper using requests as a fallback
+Alternative website scraper using plain HTTP requests as a fallback
 Use this if Playwright continues to have event loop issues
 """
 
-import requests
+import asyncio
+import multiprocessing
+import threading
+import httpx
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import re
+from functools import lru_cache
 from typing import List, Dict, Set
 from agents import Agent, Runner
 import json
-from config import REQUEST_TIMEOUT, USER_AGENT, MAX_PAGES_TO_SCRAPE
+from crawl_utils import SKIP_EXT_RE, WHITESPACE_RE, HostRateLimiter, run_on_shared_loop
+from config import (
+    REQUEST_TIMEOUT, USER_AGENT, MAX_PAGES_TO_SCRAPE, MAX_PAGE_BYTES, CRAWL_MAX_REQUESTS_PER_SECOND,
+    SIMPLE_SCRAPER_MAX_WORKERS, SIMPLE_SCRAPER_PARSE_PROCESSES, SIMPLE_ANALYSIS_BATCH_PAGES, HTTP_CACHE_PATH
+)
+
+try:
+    from lxml import html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+    lxml_html = None
+
+try:
+    from hishel import AsyncSqliteStorage
+    from hishel.httpx import AsyncCacheTransport
+    HISHEL_AVAILABLE = True
+except ImportError:
+    HISHEL_AVAILABLE = False
+    AsyncSqliteStorage = AsyncCacheTransport = None
+
+
+@lru_cache(maxsize=100_000)
+def _split_url(url: str):
+    """Netloc and path of a URL, cached since the same links appear on many pages"""
+    parsed = urlparse(url)
+    return parsed.netloc, parsed.path
+
+
+_parse_pool: ProcessPoolExecutor = None
+_parse_pool_lock = threading.Lock()
+
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    """Return the page parsing process pool shared by all crawls, starting it on first use
+    
+    Workers are started with forkserver or spawn, since forking a process that runs
+    other threads (the shared event loop, Streamlit) can deadlock the child.
+    """
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=SIMPLE_SCRAPER_PARSE_PROCESSES,
+                mp_context=multiprocessing.get_context(start_method)
+            )
+        return _parse_pool
+
+
+def _discard_parse_pool(pool: ProcessPoolExecutor):
+    """Forget a broken parse pool so the next crawl starts a fresh one"""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is pool:
+            _parse_pool = None
+    pool.shutdown(wait=False)
+
+
+@lru_cache(maxsize=256)
+def _same_site_re(netloc: str) -> re.Pattern:
+    """Regex matching absolute http(s) URLs on the given host"""
+    return re.compile(r'https?://' + re.escape(netloc) + r'(?:[/?#]|$)')
+
+
+def _extract_text_content(soup: BeautifulSoup) -> str:
+    """Extract clean text content from BeautifulSoup object"""
+    # Remove script and style elements
+    for script in soup(["script", "style", "nav", "footer", "header"]):
+        script.decompose()
+    
+    # Get text and clean it up
+    text = WHITESPACE_RE.sub(' ', soup.get_text(separator=' ')).strip()
+    
+    return text
+
+
+def _extract_metadata(url: str, content: bytes, soup: BeautifulSoup):
+    """Extract title, absolute link URLs and meta description from the page"""
+    if LXML_AVAILABLE:
+        # One C-level parse, then direct XPath lookups
+        doc = lxml_html.fromstring(content, base_url=url)
+        title_text = (doc.findtext('.//title') or '').strip() or "No title"
+        doc.make_links_absolute(url, resolve_base_href=True)
+        # Site navigation repeats on every page, so its links aren't worth the crawl budget
+        hrefs = doc.xpath('.//a[not(ancestor::nav or ancestor::header or ancestor::footer)]/@href')
+        meta_description = doc.xpath('string(.//meta[@name="description"]/@content)')
+        return title_text, hrefs, meta_description
+    
+    title = soup.find('title')
+    title_text = title.get_text().strip() if title else "No title"
+    hrefs = [urljoin(url, link['href']) for link in soup.find_all('a', href=True)]
+    meta_description = ""
+    meta_desc_tag = soup.find('meta', attrs={'name': 'description'})
+    if meta_desc_tag:
+        meta_description = meta_desc_tag.get('content', '')
+    return title_text, hrefs, meta_description
+
+
+def _parse_html(url: str, content: bytes, base_netloc: str) -> Dict:
+    """Parse a fetched page into structured data, keeping links on base_netloc
+    
+    A module-level function so it can run in a worker process.
+    """
+    try:
+        soup = BeautifulSoup(content, 'lxml')
+    except Exception as parse_error:
+        # Fall back to the slower but more lenient pure-Python parser
+        print(f"lxml parsing failed, retrying with html5lib: {parse_error}")
+        soup = BeautifulSoup(content, 'html5lib')
+    
+    # Extract main content, which also removes navigation, header and footer from the soup
+    main_content = _extract_text_content(soup)
+    
+    # Extract page information (links in the removed parts are left out)
+    title_text, hrefs, meta_description = _extract_metadata(url, content, soup)
+    
+    # Extract links for further crawling
+    same_site = _same_site_re(base_netloc)
+    links = [href for href in hrefs if same_site.match(href) and not SKIP_EXT_RE.search(href)]
+    
+    return {
+        'url': url,
+        'title': title_text,
+        'content': main_content,
+        'meta_description': meta_description,
+        'links': links,
+        'word_count': len(main_content.split()),
+        'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S')
+    }
 
 
 class SimpleWebsiteScraper:
-    def __init__(self):
+    def __init__(self, max_workers: int = SIMPLE_SCRAPER_MAX_WORKERS):
         self.visited_urls: Set[str] = set()
         self.scraped_data: List[Dict] = []
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': USER_AGENT,
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        })
-        
-    def is_valid_url(self, url: str, base_domain: str) -> bool:
-        """Check if URL is valid and belongs to the same domain"""
+        self.max_workers = max_workers
+        self._rate_limiter = HostRateLimiter(CRAWL_MAX_REQUESTS_PER_SECOND)
+        self.client: httpx.AsyncClient = None  # open for the duration of a crawl
+        self._base_netloc: str = None  # set for the duration of a crawl
+        self._parse_pool: ProcessPoolExecutor = None  # set for the duration of a crawl when parsing in processes
+    
+    def _new_client(self) -> httpx.AsyncClient:
+        """Create a pooled HTTP client, using HTTP/2 when h2 is installed
+        
+        With hishel installed and HTTP_CACHE_PATH set, responses are cached on disk and
+        revalidated with ETag/Last-Modified, so repeat crawls mostly get 304s.
+        """
+        limits = httpx.Limits(max_connections=self.max_workers * 4, max_keepalive_connections=self.max_workers * 2)
         try:
-            parsed_url = urlparse(url)
-            parsed_base = urlparse(base_domain)
-            return (
-                parsed_url.netloc == parsed_base.netloc and
-                not any(ext in url.lower() for ext in ['.pdf', '.doc', '.docx', '.jpg', '.jpeg', '.png', '.gif', '.mp4', '.mp3'])
-            )
+            transport = httpx.AsyncHTTPTransport(http2=True, limits=limits)
+        except ImportError:
+            transport = httpx.AsyncHTTPTransport(limits=limits)
+        if HISHEL_AVAILABLE and HTTP_CACHE_PATH:
+            try:
+                transport = AsyncCacheTransport(
+                    next_transport=transport,
+                    storage=AsyncSqliteStorage(database_path=HTTP_CACHE_PATH)
+                )
+            except ImportError as e:
+                # The SQLite storage needs the hishel[async] extra
+                print(f"HTTP cache unavailable, fetching without it: {e}")
+        return httpx.AsyncClient(
+            transport=transport,
+            headers={
+                'User-Agent': USER_AGENT,
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+                'Accept-Language': 'en-US,en;q=0.9',
+                'Upgrade-Insecure-Requests': '1',
+            },
+            timeout=REQUEST_TIMEOUT,
+            follow_redirects=True
+        )
+        
+    def is_valid_url(self, url: str, base_domain: str = None) -> bool:
+        """Check if URL is valid and belongs to the same domain
+        
+        Without base_domain, the domain of the crawl in progress is used. Crawls filter
+        links with _same_site_re instead; this is kept for callers of the public API.
+        """
+        try:
+            netloc, path = _split_url(url)
+            base_netloc = _split_url(base_domain)[0] if base_domain else self._base_netloc
+            return netloc == base_netloc and not SKIP_EXT_RE.search(path)
         except:
             return False
     
     def extract_text_content(self, soup: BeautifulSoup) -> str:
         """Extract clean text content from BeautifulSoup object"""
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
-        
-        # Get text and clean it up
-        text = soup.get_text()
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
-        
-        return text
+        return _extract_text_content(soup)
     
-    def scrape_page(self, url: str) -> Dict:
-        """Scrape a single page using requests and return structured data"""
-        try:
-            response = self.session.get(url, timeout=REQUEST_TIMEOUT)
+    def extract_metadata(self, url: str, content: bytes, soup: BeautifulSoup):
+        """Extract title, absolute link URLs and meta description from the page"""
+        return _extract_metadata(url, content, soup)
+    
+    def _parse(self, url: str, content: bytes) -> Dict:
+        """Parse a fetched page into structured data"""
+        return _parse_html(url, content, self._base_netloc or _split_url(url)[0])
+    
+    async def _fetch(self, url: str, max_bytes: int = MAX_PAGE_BYTES) -> bytes:
+        """Download an HTML page, giving up early on other content types and oversized bodies"""
+        async with self.client.stream('GET', url) as response:
             response.raise_for_status()
+            content_type = response.headers.get('content-type', '')
+            if content_type and 'html' not in content_type:
+                raise ValueError(f"Skipped non-HTML content ({content_type})")
+            if int(response.headers.get('content-length') or 0) > max_bytes:
+                raise ValueError(f"Skipped page larger than {max_bytes} bytes")
             
-            soup = BeautifulSoup(response.content, 'html5lib')
-            
-            # Extract page information
-            title = soup.find('title')
-            title_text = title.get_text().strip() if title else "No title"
-            
-            # Extract main content
-            main_content = self.extract_text_content(soup)
-            
-            # Extract links for further crawling
-            links = []
-            for link in soup.find_all('a', href=True):
-                href = link['href']
-                full_url = urljoin(url, href)
-                if self.is_valid_url(full_url, url):
-                    links.append(full_url)
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValueError(f"Skipped page larger than {max_bytes} bytes")
+                chunks.append(chunk)
+            return b''.join(chunks)
+    
+    async def scrape_page(self, url: str) -> Dict:
+        """Scrape a single page over HTTP and return structured data"""
+        if self.client is None:
+            # Outside a crawl, use a client just for this page
+            async with self._new_client() as self.client:
+                try:
+                    return await self.scrape_page(url)
+                finally:
+                    self.client = None
+        
+        try:
+            # Be respectful with requests, only waiting when the host is hit too fast
+            await self._rate_limiter.acquire_async(url)
+            content = await self._fetch(url)
             
-            # Extract meta information
-            meta_description = ""
-            meta_desc_tag = soup.find('meta', attrs={'name': 'description'})
-            if meta_desc_tag:
-                meta_description = meta_desc_tag.get('content', '')
-            
-            return {
-                'url': url,
-                'title': title_text,
-                'content': main_content,
-                'meta_description': meta_description,
-                'links': links,
-                'word_count': len(main_content.split()),
-                'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S')
-            }
+            # Parsing is CPU-bound, so keep it off the event loop, and during a crawl
+            # off this process too so pages are parsed on several cores at once
+            if self._parse_pool is not None:
+                pool = self._parse_pool
+                try:
+                    return await asyncio.get_running_loop().run_in_executor(
+                        pool, _parse_html, url, content, self._base_netloc
+                    )
+                except BrokenProcessPool:
+                    print("Parse worker process died, parsing in threads for the rest of the crawl")
+                    self._parse_pool = None
+                    _discard_parse_pool(pool)
+            return await asyncio.to_thread(self._parse, url, content)
             
         except Exception as e:
             return {
@@ -100,33 +271,53 @@ class SimpleWebsiteScraper:
                 'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S')
             }
     
-    def crawl_website(self, start_url: str, max_pages: int = MAX_PAGES_TO_SCRAPE) -> List[Dict]:
-        """Crawl website starting from start_url"""
+    async def crawl_website(self, start_url: str, max_pages: int = MAX_PAGES_TO_SCRAPE) -> List[Dict]:
+        """Crawl website starting from start_url with max_workers pages in flight"""
         self.visited_urls.clear()
         self.scraped_data.clear()
         
-        urls_to_visit = [start_url]
+        urls_to_visit = asyncio.Queue()
+        urls_to_visit.put_nowait(start_url)
+        queued = {start_url}  # every URL ever added to urls_to_visit
         
-        while urls_to_visit and len(self.visited_urls) < max_pages:
-            current_url = urls_to_visit.pop(0)
-            
-            if current_url in self.visited_urls:
-                continue
-                
-            self.visited_urls.add(current_url)
-            
-            print(f"Scraping: {current_url}")
-            page_data = self.scrape_page(current_url)
-            self.scraped_data.append(page_data)
-            
-            # Add new links to visit
-            if 'links' in page_data:
-                for link in page_data['links']:
-                    if link not in self.visited_urls and link not in urls_to_visit:
-                        urls_to_visit.append(link)
-            
-            # Be respectful with requests
-            time.sleep(1)
+        async def worker():
+            while True:
+                current_url = await urls_to_visit.get()
+                try:
+                    # URLs that don't fit within max_pages are dropped
+                    if len(self.visited_urls) >= max_pages:
+                        continue
+                    self.visited_urls.add(current_url)
+                    
+                    print(f"Scraping: {current_url}")
+                    page_data = await self.scrape_page(current_url)
+                    self.scraped_data.append(page_data)
+                    
+                    # Add new links to visit
+                    if 'links' in page_data:
+                        for link in page_data['links']:
+                            if link not in queued:
+                                queued.add(link)
+                                urls_to_visit.put_nowait(link)
+                finally:
+                    urls_to_visit.task_done()
+        
+        self._base_netloc = _split_url(start_url)[0]
+        if SIMPLE_SCRAPER_PARSE_PROCESSES:
+            self._parse_pool = _get_parse_pool()
+        async with self._new_client() as self.client:
+            workers = [asyncio.create_task(worker()) for _ in range(self.max_workers)]
+            try:
+                # Done once every queued URL has been handled
+                await urls_to_visit.join()
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                self.client = None
+                self._base_netloc = None
+                # The pool stays up for the next crawl and is shut down at interpreter exit
+                self._parse_pool = None
         
         return self.scraped_data
 
@@ -162,37 +353,74 @@ class SimpleUniversityInfoAgent:
         print(f"Starting to collect information from: {university_url}")
         
         # Scrape the website
-        scraped_data = self.scraper.crawl_website(university_url, max_pages)
+        scraped_data = run_on_shared_loop(self.scraper.crawl_website(university_url, max_pages))
+        
+        # The shared loop works even when called from a thread with a running event loop
+        structured_analysis = run_on_shared_loop(self._analyze(university_url, scraped_data))
+        
+        return {
+            'university_url': university_url,
+            'scraped_pages': len(scraped_data),
+            'raw_data': scraped_data,
+            'structured_analysis': structured_analysis,
+            'collection_timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+    
+    async def _analyze(self, university_url: str, scraped_data: List[Dict]) -> str:
+        """Analyze pages in parallel batches, then merge the batch analyses into one"""
+        pages = [page for page in scraped_data if 'content' in page and 'error' not in page]
+        batches = [
+            pages[i:i + SIMPLE_ANALYSIS_BATCH_PAGES] for i in range(0, len(pages), SIMPLE_ANALYSIS_BATCH_PAGES)
+        ] or [[]]
+        
+        if len(batches) > 1:
+            print(f"🤖 Analyzing {len(pages)} pages in {len(batches)} parallel batches...")
+        analyses = await asyncio.gather(
+            *(self._analyze_batch(university_url, batch, len(scraped_data)) for batch in batches)
+        )
+        if len(analyses) == 1:
+            return analyses[0]
+        
+        partial_analyses = ''.join(
+            f"\n\n--- Partial analysis {i} of {len(analyses)} ---\n{analysis}"
+            for i, analysis in enumerate(analyses, 1)
+        )
+        prompt = f"""
+        The following are partial analyses of different pages from the same university website.
+        Merge them into a single comprehensive analysis in a structured format.
         
-        # Prepare data for the agent
-        combined_content = ""
-        for page in scraped_data:
-            if 'content' in page and 'error' not in page:
-                combined_content += f"\n\n--- Page: {page['title']} ({page['url']}) ---\n"
-                combined_content += page['content'][:2000]  # Limit content per page
+        Website URL: {university_url}
+        Number of pages scraped: {len(scraped_data)}
+        
+        Partial analyses:
+        {partial_analyses}
+        
+        Combine overlapping information, keep the verbatim quotes, and drop repetition.
+        """
+        result = await Runner.run(self.agent, prompt)
+        return result.final_output
+    
+    async def _analyze_batch(self, university_url: str, pages: List[Dict], total_pages: int) -> str:
+        """Analyze one batch of scraped pages"""
+        combined_content = ''.join(
+            f"\n\n--- Page: {page['title']} ({page['url']}) ---\n{page['content'][:2000]}"  # Limit content per page
+            for page in pages
+        )
         
         # Use the agent to analyze and structure the information
         prompt = f"""
         Analyze the following university website content and extract relevant information in a structured format.
         
         Website URL: {university_url}
-        Number of pages scraped: {len(scraped_data)}
+        Number of pages scraped: {total_pages}
         
         Content to analyze:
         {combined_content}
         
         Please provide a comprehensive analysis with verbatim quotes where relevant.
         """
-        
-        result = Runner.run_sync(self.agent, prompt)
-        
-        return {
-            'university_url': university_url,
-            'scraped_pages': len(scraped_data),
-            'raw_data': scraped_data,
-            'structured_analysis': result.final_output,
-            'collection_timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
-        }
+        result = await Runner.run(self.agent, prompt)
+        return result.final_output
     
     def export_to_json(self, data: Dict, filename: str = None) -> str:
         """Export collected data to JSON file"""